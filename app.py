@@ -9,7 +9,13 @@ This app demonstrates Google ADK's SequentialAgent pattern:
 
 import gradio as gr
 import asyncio
+import contextlib
+import functools
+import json
 import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import altair as alt
 from dotenv import load_dotenv
@@ -21,11 +27,148 @@ from bi_agent import root_runner
 # Load environment variables from bi_agent/.env
 load_dotenv(dotenv_path='bi_agent/.env')
 
+# Role used for messages sent to the agent pipeline
+USER_ROLE = 'user'
 
-async def run_bi_pipeline_async(user_question: str):
+# State keys that map to the four output panels
+OUTPUT_KEYS = ('sql_query', 'query_results', 'chart_spec', 'explanation_text')
+
+# Sentinel for state keys absent from an update
+MISSING = object()
+
+# Maximum number of pipeline runs at once, and of requests waiting for a slot.
+# Requests beyond the queue size are rejected by Gradio with a "queue full" message.
+PIPELINE_CONCURRENCY_LIMIT = 8
+QUEUE_MAX_SIZE = 32
+
+# State deltas arriving within this window are merged into one UI update
+UI_FLUSH_INTERVAL = 0.1  # seconds
+
+# Single worker thread for executing generated chart code. Keeps the blocking
+# exec off Gradio's event loop and runs one chart at a time, since Altair's
+# global settings are not thread-safe.
+CHART_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chart')
+
+
+@functools.lru_cache(maxsize=128)
+def compile_chart_code(chart_code: str):
+    """
+    Compile generated Altair chart code, caching the code object per source.
+
+    Args:
+        chart_code: Python source produced by the visualization agent
+
+    Returns:
+        Compiled code object ready for exec
+    """
+    return compile(chart_code, '<chart_spec>', 'exec')
+
+
+def strip_code_fences(text: str, language: str) -> str:
+    """
+    Remove markdown code fences from agent output.
+
+    Args:
+        text: Raw agent output
+        language: Expected fence language tag (e.g. 'sql', 'python')
+
+    Returns:
+        Text without surrounding code fences
+    """
+    text = text.strip()
+    if text.startswith(f"```{language}"):
+        text = text.replace(f"```{language}", "").replace("```", "").strip()
+    elif text.startswith("```"):
+        text = text.replace("```", "").strip()
+    return text
+
+
+def parse_query_results(query_results_str) -> dict:
+    """
+    Parse the SQL executor agent's JSON output.
+
+    Args:
+        query_results_str: JSON string (or already parsed dict) from state
+
+    Returns:
+        Dictionary with keys: success, data, error
+    """
+    try:
+        return json.loads(query_results_str) if isinstance(query_results_str, str) else query_results_str
+    except:
+        return {'success': False, 'data': [], 'error': 'Failed to parse query results'}
+
+
+def build_chart(chart_spec: str, df: pd.DataFrame):
+    """
+    Execute the visualization agent's Altair code against the query results.
+
+    Args:
+        chart_spec: Python code generated by the visualization agent
+        df: Query results as DataFrame
+
+    Returns:
+        Altair chart, or None if the code fails or defines no chart
+    """
+    try:
+        chart_spec_clean = strip_code_fences(chart_spec, "python")
+
+        # Create namespace and execute chart code
+        namespace = {
+            'alt': alt,
+            'pd': pd,
+            'df': df,
+            'data': df.to_dict(orient='records')
+        }
+
+        exec(compile_chart_code(chart_spec_clean), namespace)
+
+        return namespace.get('chart')
+    except Exception as e:
+        print(f"Chart generation error: {str(e)}")
+        traceback.print_exc()
+        return None
+
+
+def create_user_message(text: str) -> types.Content:
+    """
+    Build the ADK user message for a question.
+
+    Args:
+        text: Message text
+
+    Returns:
+        types.Content with the user role and a single text part
+    """
+    return types.Content(role=USER_ROLE, parts=[types.Part(text=text)])
+
+
+async def get_or_create_session(session_id):
+    """
+    Return the browser tab's ADK session id, creating a session if needed.
+
+    Args:
+        session_id: Session id stored in the tab's gr.State, or None
+
+    Returns:
+        ADK session id
+    """
+    if session_id is None:
+        session = await root_runner.session_service.create_session(
+            user_id='user',
+            app_name='bi_agent'
+        )
+        session_id = session.id
+    return session_id
+
+
+async def run_bi_pipeline_async(user_question: str, session_id: str):
     """
     Run the complete BI pipeline using root_runner.
 
+    The ADK session is kept per browser tab and reused across requests,
+    so follow-up questions share the conversation context.
+
     This function executes the entire BI pipeline:
     1. Text-to-SQL: Generate SQL from question
     2. SQL Execution: Execute query against database
@@ -35,43 +178,102 @@ async def run_bi_pipeline_async(user_question: str):
 
     Args:
         user_question: Natural language question from the user
+        session_id: ADK session id for the current browser tab
 
-    Returns:
-        Dictionary with keys: sql_query, query_results, chart_spec, explanation_text
+    Yields:
+        State delta dictionaries as each agent finishes (keys include
+        sql_query, query_results, chart_spec, explanation_text)
     """
-    # Create session
-    session = await root_runner.session_service.create_session(
-        user_id='user',
-        app_name='bi_agent'
-    )
-
     # Create user message
-    content = types.Content(
-        role='user',
-        parts=[types.Part(text=user_question)]
-    )
+    content = create_user_message(user_question)
 
-    # Run the complete pipeline
-    events_async = root_runner.run_async(
+    # Run the complete pipeline and forward state updates as they arrive.
+    # aclosing() finalizes the event stream promptly on early exit or error
+    # instead of leaving it to the garbage collector.
+    async with contextlib.aclosing(root_runner.run_async(
         user_id='user',
-        session_id=session.id,
+        session_id=session_id,
         new_message=content
-    )
+    )) as events_async:
+        async for event in events_async:
+            if event.actions and event.actions.state_delta:
+                state_delta = event.actions.state_delta
+                yield state_delta
+
+                # explanation_text is produced by the last agent, so stop here
+                if 'explanation_text' in state_delta:
+                    break
+
+
+async def coalesce_state_deltas(state_deltas, interval: float = UI_FLUSH_INTERVAL):
+    """
+    Merge state deltas that arrive within `interval` seconds of each other.
+
+    Waiting on the stream itself (instead of yielding to the UI per event)
+    keeps bursts of agent events from turning into bursts of UI updates.
+
+    The source is consumed by a single producer task that feeds a queue, so
+    it is started, advanced and closed in one task and one context. ADK opens
+    its tracing span inside run_async, which relies on that.
+
+    Args:
+        state_deltas: Async generator of state delta dictionaries
+        interval: Maximum time to hold a delta while waiting for more
+
+    Yields:
+        Merged state delta dictionaries
+    """
+    queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async with contextlib.aclosing(state_deltas):
+                async for delta in state_deltas:
+                    queue.put_nowait(delta)
+        finally:
+            queue.put_nowait(MISSING)
+
+    producer = asyncio.create_task(produce())
+    try:
+        merged = None
+        deadline = None
+        while True:
+            # Wait indefinitely when nothing is buffered, else until the flush deadline
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                delta = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                yield merged
+                merged = deadline = None
+                continue
+
+            if delta is MISSING:
+                break
 
-    # Extract results from state
-    results = {}
-    async for event in events_async:
-        if event.actions and event.actions.state_delta:
-            for key, value in event.actions.state_delta.items():
-                results[key] = value
+            if merged is None:
+                merged = dict(delta)
+                deadline = time.monotonic() + interval
+            else:
+                merged.update(delta)
 
-    return results
+        if merged is not None:
+            yield merged
 
+        # Surface pipeline errors raised in the producer
+        await producer
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
 
-async def process_request_async(message: str):
+
+async def process_request_async(message: str, session_id):
     """
     Process user request through the BI pipeline using root_runner.
 
+    Registered directly as the Gradio handler, so it runs on Gradio's own
+    event loop without a sync wrapper. Outputs are streamed: each panel is
+    updated as soon as the agent producing it finishes.
+
     The root_agent handles the complete pipeline:
     1. Text-to-SQL Agent → Generates SQL from question
     2. SQL Executor Agent → Executes SQL against database
@@ -80,106 +282,103 @@ async def process_request_async(message: str):
 
     Args:
         message: User's natural language question
+        session_id: Session id stored in the tab's gr.State, or None
 
-    Returns:
-        Tuple of (sql_query, df, chart, explanation_text)
+    Yields:
+        Tuples of (sql_query, df, chart, explanation_text, session_id)
     """
     try:
         # Validate input
         if not message.strip():
-            return "Error: Please enter a question", None, None, "Error: No question provided"
+            yield "Error: Please enter a question", None, None, "Error: No question provided", session_id
+            return
 
-        # Run the complete BI pipeline
-        results = await run_bi_pipeline_async(message)
+        sql_query = ""
+        df = None
+        chart = None
+        explanation_text = ""
 
-        # Extract SQL query
-        sql_query = results.get('sql_query', '')
+        # Clear results from the previous question before streaming new ones
+        yield "-- Generating SQL...", None, None, "*Analyzing...*", session_id
 
-        # Clean up SQL query (remove markdown if present)
-        sql_query = sql_query.strip()
-        if sql_query.startswith("```sql"):
-            sql_query = sql_query.replace("```sql", "").replace("```", "").strip()
-        elif sql_query.startswith("```"):
-            sql_query = sql_query.replace("```", "").strip()
+        session_id = await get_or_create_session(session_id)
 
-        # Extract query results
-        query_results_str = results.get('query_results', '{}')
-        try:
-            import json
-            query_results = json.loads(query_results_str) if isinstance(query_results_str, str) else query_results_str
-        except:
-            query_results = {'success': False, 'data': [], 'error': 'Failed to parse query results'}
-
-        # Check if query execution was successful
-        if not query_results.get('success', False):
-            error_msg = query_results.get('error', 'Unknown error')
-            sql_query = f"-- Error executing query\n{sql_query}\n\n-- Error: {error_msg}"
-            return sql_query, None, None, f"Error executing query: {error_msg}"
-
-        # Convert query results to DataFrame
-        data_list = query_results.get('data', [])
-        if not data_list:
-            df = pd.DataFrame()
-            return sql_query, df, None, "The query executed successfully but returned no data."
-
-        df = pd.DataFrame(data_list)
-
-        # Extract chart specification and explanation
-        chart_spec = results.get('chart_spec', '')
-        explanation_text = results.get('explanation_text', '')
-
-        # Execute chart specification
-        chart = None
-        if chart_spec:
-            try:
-                chart_spec_clean = chart_spec.strip()
-                if chart_spec_clean.startswith("```python"):
-                    chart_spec_clean = chart_spec_clean.replace("```python", "").replace("```", "").strip()
-                elif chart_spec_clean.startswith("```"):
-                    chart_spec_clean = chart_spec_clean.replace("```", "").strip()
-
-                # Create namespace and execute chart code
-                namespace = {
-                    'alt': alt,
-                    'pd': pd,
-                    'df': df,
-                    'data': df.to_dict(orient='records')
-                }
-
-                exec(chart_spec_clean, namespace)
-
-                if 'chart' in namespace:
-                    chart = namespace['chart']
-            except Exception as e:
-                print(f"Chart generation error: {str(e)}")
-                import traceback
-                traceback.print_exc()
-
-        # Return all four outputs
-        return sql_query, df, chart, explanation_text
+        # Run the complete BI pipeline
+        state_deltas = coalesce_state_deltas(run_bi_pipeline_async(message, session_id))
+        async with contextlib.aclosing(state_deltas):
+            async for state_delta in state_deltas:
+                # Look up each panel's key once; MISSING marks keys not in this update
+                updates = [state_delta.get(key, MISSING) for key in OUTPUT_KEYS]
+
+                # Skip state updates that don't affect any panel
+                if all(update is MISSING for update in updates):
+                    continue
+
+                sql_update, results_update, chart_update, explanation_update = updates
+
+                # Extract SQL query
+                if sql_update is not MISSING:
+                    sql_query = strip_code_fences(sql_update, "sql")
+
+                # Extract query results
+                if results_update is not MISSING:
+                    query_results = parse_query_results(results_update)
+
+                    # Check if query execution was successful
+                    if not query_results.get('success', False):
+                        error_msg = query_results.get('error', 'Unknown error')
+                        sql_query = f"-- Error executing query\n{sql_query}\n\n-- Error: {error_msg}"
+                        yield sql_query, None, None, f"Error executing query: {error_msg}", session_id
+                        return
+
+                    # Convert query results to DataFrame
+                    data_list = query_results.get('data', [])
+                    if not data_list:
+                        yield sql_query, pd.DataFrame(), None, "The query executed successfully but returned no data.", session_id
+                        return
+
+                    df = pd.DataFrame(data_list)
+
+                # Execute chart specification
+                if chart_update is not MISSING and df is not None:
+                    chart = await asyncio.get_running_loop().run_in_executor(
+                        CHART_EXECUTOR, build_chart, chart_update, df
+                    )
+
+                # Extract explanation
+                if explanation_update is not MISSING:
+                    explanation_text = explanation_update
+
+                # Send only the panels this update changed, so the data table
+                # and chart are not re-sent and re-rendered on every step
+                yield (
+                    sql_query if sql_update is not MISSING else gr.skip(),
+                    df if results_update is not MISSING else gr.skip(),
+                    chart if chart_update is not MISSING else gr.skip(),
+                    explanation_text if explanation_update is not MISSING else gr.skip(),
+                    session_id
+                )
+
+        # Pipeline ended without query results
+        if df is None:
+            sql_query = f"-- Error executing query\n{sql_query}\n\n-- Error: Unknown error"
+            yield sql_query, None, None, "Error executing query: Unknown error", session_id
 
     except Exception as e:
         error_msg = f"Error: {str(e)}"
         print(f"Full error: {e}")
-        import traceback
         traceback.print_exc()
-        return error_msg, None, None, error_msg
+        yield error_msg, None, None, error_msg, session_id
 
 
-def process_request(message: str):
+def reset_session():
     """
-    Synchronous wrapper for Gradio.
+    Start a new conversation by discarding the tab's ADK session.
 
-    Database credentials are read from environment variables in bi_agent/.env
+    Returns:
+        Cleared values for the input, all four output panels and the session state
     """
-    try:
-        sql_query, df, chart, explanation = asyncio.run(
-            process_request_async(message)
-        )
-        return sql_query, df, chart, explanation
-    except Exception as e:
-        error_msg = f"Error: {str(e)}"
-        return error_msg, None, None, error_msg
+    return "", "-- Waiting for input...", None, None, "*Waiting for input...*", None
 
 
 # ============================================================================
@@ -187,6 +386,9 @@ def process_request(message: str):
 # ============================================================================
 
 with gr.Blocks(title="Business Intelligence Agent") as demo:
+    # ADK session id for this browser tab
+    session_state = gr.State(None)
+
     gr.Markdown("""
     # Business Intelligence Agent (Google ADK)
 
@@ -212,6 +414,7 @@ with gr.Blocks(title="Business Intelligence Agent") as demo:
     with gr.Row():
         submit_btn = gr.Button("Analyze Data", variant="primary")
         clear_btn = gr.Button("Clear")
+        new_conversation_btn = gr.Button("New Conversation")
 
     gr.Markdown("## Results")
 
@@ -257,9 +460,10 @@ with gr.Blocks(title="Business Intelligence Agent") as demo:
 
     # Button actions
     submit_btn.click(
-        fn=process_request,
-        inputs=[user_input],
-        outputs=[sql_output, data_output, chart_output, explanation_output]
+        fn=process_request_async,
+        inputs=[user_input, session_state],
+        outputs=[sql_output, data_output, chart_output, explanation_output, session_state],
+        concurrency_limit=PIPELINE_CONCURRENCY_LIMIT
     )
 
     clear_btn.click(
@@ -274,6 +478,15 @@ with gr.Blocks(title="Business Intelligence Agent") as demo:
         outputs=[user_input, sql_output, data_output, chart_output, explanation_output]
     )
 
+    new_conversation_btn.click(
+        fn=reset_session,
+        inputs=None,
+        outputs=[user_input, sql_output, data_output, chart_output, explanation_output, session_state]
+    )
+
+# Bound the request queue so bursts are shed instead of piling up
+demo.queue(max_size=QUEUE_MAX_SIZE)
+
 
 if __name__ == "__main__":
     demo.launch()
@@ -124,23 +124,23 @@ def get_schema_info(engine: Engine, limit_tables: list[str] = None, max_tables:
             # Limit number of tables if needed
             table_names = list(tables.keys())[:max_tables]
 
-            # Format as readable text
-            schema_text = "Database Schema:\n\n"
+            # Format as readable text (collect lines and join once)
+            lines = ["Database Schema:", ""]
 
             for table_name in table_names:
-                schema_text += f"Table: {table_name}\n"
-                schema_text += "Columns:\n"
+                lines.append(f"Table: {table_name}")
+                lines.append("Columns:")
 
                 for col in tables[table_name]:
                     nullable = "NULL" if col['nullable'] == 'YES' else "NOT NULL"
-                    schema_text += f"  - {col['name']} ({col['type']}, {nullable})\n"
+                    lines.append(f"  - {col['name']} ({col['type']}, {nullable})")
 
-                schema_text += "\n"
+                lines.append("")
 
             if len(tables) > max_tables:
-                schema_text += f"\n... and {len(tables) - max_tables} more tables\n"
+                lines.append(f"\n... and {len(tables) - max_tables} more tables")
 
-            return schema_text
+            return "\n".join(lines) + "\n"
 
     except Exception as e:
         return f"Error retrieving schema: {str(e)}"
@@ -18,6 +18,15 @@ BLACKLIST_KEYWORDS = [
     'sp_', 'xp_'  # System stored procedures
 ]
 
+# Precompiled patterns used by validate_sql
+LINE_COMMENT_PATTERN = re.compile(r'--.*$', flags=re.MULTILINE)
+BLOCK_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', flags=re.DOTALL)
+# Use word boundaries to avoid false positives (e.g., "DELETE" in column name)
+BLACKLIST_PATTERNS = [
+    (keyword, re.compile(r'\b' + re.escape(keyword.upper()) + r'\b'))
+    for keyword in BLACKLIST_KEYWORDS
+]
+
 
 def validate_sql(query: str) -> tuple[bool, str]:
     """
@@ -35,8 +44,8 @@ def validate_sql(query: str) -> tuple[bool, str]:
         return False, "Query is empty"
 
     # Remove comments and normalize whitespace
-    query_clean = re.sub(r'--.*$', '', query, flags=re.MULTILINE)
-    query_clean = re.sub(r'/\*.*?\*/', '', query_clean, flags=re.DOTALL)
+    query_clean = LINE_COMMENT_PATTERN.sub('', query)
+    query_clean = BLOCK_COMMENT_PATTERN.sub('', query_clean)
     query_clean = query_clean.strip().upper()
 
     # Check if query starts with SELECT
@@ -44,10 +53,8 @@ def validate_sql(query: str) -> tuple[bool, str]:
         return False, "Only SELECT queries are allowed"
 
     # Check for blacklisted keywords
-    for keyword in BLACKLIST_KEYWORDS:
-        # Use word boundaries to avoid false positives (e.g., "DELETE" in column name)
-        pattern = r'\b' + re.escape(keyword.upper()) + r'\b'
-        if re.search(pattern, query_clean):
+    for keyword, pattern in BLACKLIST_PATTERNS:
+        if pattern.search(query_clean):
             return False, f"Dangerous keyword detected: {keyword}"
 
     # Check for multiple statements (semicolon-separated)
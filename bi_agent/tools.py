@@ -7,6 +7,7 @@ execute queries, and process results.
 
 import os
 import json
+import time
 import pandas as pd
 from typing import Dict, Any
 from dotenv import load_dotenv
@@ -16,6 +17,13 @@ from .sql_executor import execute_query, validate_sql
 # Load environment variables
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 
+# Schema cache keyed by (server, database, username), storing
+# (time.monotonic(), schema). The text-to-SQL agent calls get_database_schema
+# on every question, while the schema rarely changes; entries expire so
+# schema changes are picked up without a restart.
+_SCHEMA_CACHE: Dict[tuple, tuple] = {}
+SCHEMA_CACHE_TTL = 600  # seconds
+
 
 class DatabaseTools:
     """Tools for database operations that agents can use."""
@@ -164,6 +172,8 @@ def get_database_schema() -> str:
 
     Returns formatted schema showing available tables and columns that can be
     queried. This helps the text-to-SQL agent understand the database structure.
+    Successful lookups are cached per database for SCHEMA_CACHE_TTL seconds,
+    so repeated calls skip the database round-trip.
 
     Returns:
         Formatted string containing database schema information
@@ -189,6 +199,12 @@ def get_database_schema() -> str:
         if not all([server, database, username, password]):
             return "Error: Database credentials not configured in environment variables"
 
+        # Return cached schema if it has not expired
+        cache_key = (server, database, username)
+        cached = _SCHEMA_CACHE.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] <= SCHEMA_CACHE_TTL:
+            return cached[1]
+
         # Create database engine
         engine = create_db_engine(server, database, username, password)
 
@@ -198,6 +214,10 @@ def get_database_schema() -> str:
         # Close engine
         engine.dispose()
 
+        # Only cache successful lookups
+        if not schema_info.startswith("Error"):
+            _SCHEMA_CACHE[cache_key] = (time.monotonic(), schema_info)
+
         return schema_info
 
     except Exception as e: